@@ -25,13 +25,25 @@ Exit codes:
 from __future__ import annotations
 
 import argparse
+import fnmatch
+import functools
+import hashlib
 import json
+import mmap
 import os
+import re
+import shlex
 import subprocess
 import sys
 import time
-from pathlib import Path, PurePosixPath
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None  # optional speedup; stdlib json is the fallback
 
 
 def _now() -> int:
@@ -44,24 +56,69 @@ def _iso(ts: Optional[int] = None) -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(ts))
 
 
+_REPO_ROOT: Optional[Path] = None
+
+
 def _repo_root() -> Path:
-    return Path(os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())).resolve()
+    # abspath, not resolve(): git -C and our own path joins are fine with a
+    # non-canonical path, so skip the per-component symlink walk.
+    global _REPO_ROOT
+    if _REPO_ROOT is None:
+        _REPO_ROOT = Path(os.path.abspath(os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())))
+    return _REPO_ROOT
 
 
-def _posix(path: str) -> str:
-    return path.replace("\\", "/")
+def _loads(data: bytes) -> Any:
+    # Parse straight from bytes (no separate decode pass)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def _load_json(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text())
+    return _loads(path.read_bytes())
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    # Compact by default: these artifacts are read by the hooks, not people.
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Write a sibling temp file and rename it over path, so a reader (or a
+    # killed writer) never leaves a torn file behind. The parent directory
+    # is only created when the first write finds it missing.
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(data)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
 
 
-def _merge_dict(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
-    out = dict(base)
+def _merge_dict(base: Dict[str, Any], override: Dict[str, Any], inplace: bool = False) -> Dict[str, Any]:
+    # inplace=True updates `base` and its nested dicts directly (fine when it
+    # was freshly loaded and isn't shared); otherwise only what changes is copied.
+    out = base if inplace else dict(base)
     for k, v in override.items():
-        if isinstance(v, dict) and isinstance(out.get(k), dict):
-            out[k] = dict(out[k])  # type: ignore
-            out[k].update(v)       # type: ignore
+        cur = out.get(k)
+        if isinstance(v, dict) and isinstance(cur, dict):
+            if inplace:
+                cur.update(v)
+            else:
+                out[k] = {**cur, **v}
         else:
             out[k] = v
     return out
@@ -70,64 +127,216 @@ def _merge_dict(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any
 def _load_profiles_config(repo: Path) -> Dict[str, Any]:
     cfg_dir = repo / ".claude" / "auth_assurance" / "config"
     p = cfg_dir / "profiles.json"
-    if not p.exists():
+    # One listdir answers for both files in cfg_dir (instead of a stat each).
+    try:
+        names = set(os.listdir(cfg_dir))
+    except OSError:
+        names = set()
+    if "profiles.json" not in names:
         raise FileNotFoundError(f"missing profiles config: {p}")
     cfg = _load_json(p)
 
-    override_candidates = [
-        cfg_dir / "profiles.local.json",
-        repo / ".claude" / "local" / "auth_assurance_overrides" / "profiles.json",
-    ]
-    for o in override_candidates:
-        if o.exists():
-            try:
-                cfg = _merge_dict(cfg, _load_json(o))
-            except Exception:
-                pass
+    overrides: List[Path] = []
+    if "profiles.local.json" in names:
+        overrides.append(cfg_dir / "profiles.local.json")
+    shared = repo / ".claude" / "local" / "auth_assurance_overrides" / "profiles.json"
+    if os.path.isfile(shared):
+        overrides.append(shared)
+    for o in overrides:
+        try:
+            cfg = _merge_dict(cfg, _load_json(o), inplace=True)
+        except Exception:
+            pass
+
+    # Compile trigger globs once per config load, not per selection.
+    cfg["_selectors"] = _build_selectors(cfg)
     return cfg
 
 
-def _git_diff_files(repo: Path, base_branch: str) -> List[str]:
+def _git_diff_files(repo: Path, base_branch: str) -> List[bytes]:
+    # -z: NUL-terminated raw paths, no quoting and nothing to strip.
+    # --no-renames: skip rename scoring; a rename lists both old and new path.
+    # Kept as bytes; decode (os.fsdecode) only where a str is needed.
     out = subprocess.check_output(
-        ["git", "-C", str(repo), "diff", "--name-only", f"{base_branch}...HEAD"],
-        text=True,
+        ["git", "-C", str(repo), "diff", "--name-only", "--no-renames", "-z", f"{base_branch}...HEAD"],
     )
-    return sorted([l.strip() for l in out.splitlines() if l.strip()])
+    # Already in git's path order (byte-wise, stable), which the fingerprint
+    # is taken over; no re-sort needed.
+    return out.split(b"\0")[:-1]
 
 
-def _fingerprint(files: List[str]) -> str:
-    import hashlib
-    h = hashlib.sha256()
-    for f in files:
-        h.update(f.encode("utf-8"))
-        h.update(b"\n")
-    return h.hexdigest()
+def _fingerprint(files: List[bytes]) -> str:
+    # Only ever compared for equality with the last run's value, so a 128-bit
+    # BLAKE2b over the newline-joined paths (one hash call) is plenty.
+    return hashlib.blake2b(b"\n".join(files), digest_size=16).hexdigest()
+
+
+_SHA_RE = re.compile(r"[0-9a-f]{40}(?:[0-9a-f]{24})?")
 
 
-def _match_any(file_path: str, patterns: List[str]) -> bool:
-    p = PurePosixPath(_posix(file_path))
-    for pat in patterns:
+def _git_dirs(repo: Path) -> Optional[Tuple[Path, Path]]:
+    # (git_dir, common_dir). In a linked worktree .git is a "gitdir: <path>"
+    # file and branch refs live in the main repo's dir named by "commondir".
+    dot_git = repo / ".git"
+    try:
+        if dot_git.is_dir():
+            git_dir = dot_git
+        else:
+            line = dot_git.read_text().strip()
+            if not line.startswith("gitdir: "):
+                return None
+            git_dir = repo / line[len("gitdir: "):]
+    except OSError:
+        return None
+    try:
+        common_dir = git_dir / (git_dir / "commondir").read_text().strip()
+    except OSError:
+        common_dir = git_dir
+    return git_dir, common_dir
+
+
+def _read_ref(dirs: Tuple[Path, Path], ref: str, depth: int = 0) -> Optional[str]:
+    # Resolve a full ref name to a SHA from loose refs / packed-refs.
+    git_dir, common_dir = dirs
+    if depth > 5:
+        return None
+    for d in dict.fromkeys((git_dir, common_dir)):
         try:
-            if p.match(pat):
-                return True
-        except Exception:
-            if file_path == pat:
-                return True
-    return False
+            val = (d / ref).read_text().strip()
+        except OSError:
+            continue
+        if val.startswith("ref: "):
+            return _read_ref(dirs, val[len("ref: "):], depth + 1)
+        return val if _SHA_RE.fullmatch(val) else None
+    try:
+        with (common_dir / "packed-refs").open(encoding="utf-8") as f:
+            for line in f:
+                sha, _, name = line.rstrip("\n").partition(" ")
+                if name == ref and _SHA_RE.fullmatch(sha):
+                    return sha
+    except OSError:
+        pass
+    return None
+
+
+def _rev_sha(dirs: Tuple[Path, Path], rev: str) -> Optional[str]:
+    # SHA for HEAD or a branch/tag/remote name, looked up in the same order as
+    # git rev-parse, without spawning git. None for anything fancier
+    # (rev~N, @{u}, ...) or storage we don't read (e.g. reftable).
+    if _SHA_RE.fullmatch(rev):
+        return rev
+    for ref in (rev, f"refs/{rev}", f"refs/tags/{rev}", f"refs/heads/{rev}",
+                f"refs/remotes/{rev}", f"refs/remotes/{rev}/HEAD"):
+        sha = _read_ref(dirs, ref)
+        if sha:
+            return sha
+    return None
+
+
+def _head_fingerprint(repo: Path, base_branch: str) -> Optional[str]:
+    # "<base sha>:<HEAD sha>", read from .git without spawning git. The
+    # base...HEAD file list is fixed by these two commits, so an equal value
+    # means an unchanged diff. None if either can't be resolved this way.
+    dirs = _git_dirs(repo)
+    if dirs is None:
+        return None
+    head_sha = _rev_sha(dirs, "HEAD")
+    base_sha = _rev_sha(dirs, base_branch)
+    if not head_sha or not base_sha:
+        return None
+    return f"{base_sha}:{head_sha}"
+
+
+_TRANSLATED_RE = re.compile(r"\(\?s:(.*)\)\\[Zz]", re.DOTALL)
+# An escape, or a whole character class, in fnmatch.translate output
+# (outside classes every literal "[" is escaped).
+_CLASS_OR_ESCAPE_RE = re.compile(r"\\.|\[(\^?)(\]?)((?:\\.|[^\]\\])*)\]", re.DOTALL)
+
+
+def _no_newline_in_classes(body: str) -> str:
+    # Unlike "*" and "?" (plain "." without DOTALL), a class can match the
+    # "\n" between two joined paths: "[!x]" becomes "[^x]", and a range
+    # such as "[\x01-z]" spans it. Guard every class with a lookahead so it
+    # stays within one path.
+    def fix(m: "re.Match[str]") -> str:
+        if m.group(1) is None:
+            return m.group()  # an escape, not a class
+        return r"(?!\n)" + m.group()
+
+    return _CLASS_OR_ESCAPE_RE.sub(fix, body)
+
+
+def _compile_triggers(triggers: Tuple[str, ...]) -> "re.Pattern[str]":
+    # All of a profile's trigger globs as one alternation, for searching a
+    # newline-joined list of paths in one pass (instead of glob-matching each
+    # file against each trigger). fnmatch's DOTALL flag and \Z are dropped so
+    # "*" stays within a line and each alternative is anchored to a whole line.
+    bodies = []
+    for t in triggers:
+        m = _TRANSLATED_RE.fullmatch(fnmatch.translate(t))
+        if m is None:
+            raise ValueError(f"unexpected fnmatch.translate output for {t!r}")
+        bodies.append(_no_newline_in_classes(m.group(1)))
+    return re.compile("^(?:(?:" + ")|(?:".join(bodies) + "))$", re.MULTILINE)
+
+
+_GLOB_CHAR_RE = re.compile(r"[*?\[]")
+
+
+def _trigger_topdirs(triggers: Tuple[str, ...]) -> Optional[FrozenSet[str]]:
+    # Top-level path components the triggers can match, from each glob's
+    # literal prefix ("kamiwaza/services/auth/**" -> "kamiwaza"). None when a
+    # trigger has a wildcard in its first component ("*.py"), as that can
+    # match under any top-level directory.
+    tops = set()
+    for t in triggers:
+        m = _GLOB_CHAR_RE.search(t)
+        top, sep, _ = (t if m is None else t[: m.start()]).partition("/")
+        if not sep and m is not None:
+            return None
+        tops.add(top)
+    return frozenset(tops)
+
+
+_Selector = Tuple[str, "re.Pattern[str]", Optional[FrozenSet[str]]]
+
+
+def _build_selectors(cfg: Dict[str, Any]) -> List[_Selector]:
+    # (name, compiled triggers, trigger top dirs) for each auto-selectable
+    # profile, in config order; "all", auto_select=false and trigger-less
+    # profiles are dropped here, so selection never looks at profile dicts.
+    selectors: List[_Selector] = []
+    for name, p in cfg.get("profiles", {}).items():
+        if name == "all" or not isinstance(p, dict) or p.get("auto_select") is False:
+            continue
+        triggers = tuple(p.get("triggers") or ())
+        if triggers:
+            selectors.append((name, _compile_triggers(triggers), _trigger_topdirs(triggers)))
+    return selectors
 
 
 def _select_profiles(cfg: Dict[str, Any], files: List[str]) -> List[str]:
-    profs = cfg.get("profiles", {})
+    if not files:
+        return []
+    selectors = cfg.get("_selectors")
+    if selectors is None:
+        selectors = _build_selectors(cfg)
+    files_blob = "\n".join(files)
+    # Changed files grouped by top-level component, so a profile is only
+    # searched against the directories its triggers can match.
+    by_topdir: Dict[str, List[str]] = {}
+    for f in files:
+        by_topdir.setdefault(f.partition("/")[0], []).append(f)
+    topdir_blobs = {d: "\n".join(fs) for d, fs in by_topdir.items()}
     selected: List[str] = []
-    for name, p in profs.items():
-        if name == "all":
-            continue
-        if isinstance(p, dict) and p.get("auto_select") is False:
-            continue
-        triggers = p.get("triggers", []) if isinstance(p, dict) else []
-        if triggers and any(_match_any(f, triggers) for f in files):
+    for name, compiled, topdirs in selectors:
+        if topdirs is None:
+            hit = compiled.search(files_blob) is not None
+        else:
+            hit = any(compiled.search(topdir_blobs[d]) for d in topdirs if d in topdir_blobs)
+        if hit:
             selected.append(name)
-    return sorted(set(selected))
+    return sorted(selected)
 
 
 
@@ -135,31 +344,66 @@ def _ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
-def _run_cmd_capture(cmd: str, cwd: Path, env: Dict[str, str], log_path: Path) -> int:
-    # Run with shell for command templates; capture stdout+stderr into file.
-    with log_path.open("w", encoding="utf-8") as f:
-        p = subprocess.Popen(
-            cmd,
-            cwd=str(cwd),
-            shell=True,
-            stdout=f,
-            stderr=subprocess.STDOUT,
-            env=env,
-            text=True,
-        )
-        return int(p.wait())
-
-
-def _parse_evidence_dir(log_text: str) -> Optional[str]:
-    # Try a few common banner formats, e.g.:
-    #   Evidence: /tmp/claude-baseline/post/<profile>/<timestamp>
-    #   Evidence directory: /tmp/...
-    import re
-    for line in log_text.splitlines():
-        m = re.match(r"^\s*Evidence(?: directory)?:\s*(\S+)\s*$", line)
-        if m:
-            return m.group(1)
-    return None
+# Runner evidence banner, e.g.:
+#   Evidence: /tmp/claude-baseline/post/<profile>/<timestamp>
+#   Evidence directory: /tmp/...
+_EVIDENCE_RE = re.compile(rb"^[^\S\n]*Evidence(?: directory)?:[^\S\n]*(\S+)[^\S\n]*$", re.MULTILINE)
+
+
+def _build_runner_env(cfg: Dict[str, Any]) -> Dict[str, str]:
+    # Process env + runner.env from config; shared by every profile's runner.
+    runner_env = cfg.get("runner", {}).get("env", {})
+    if not isinstance(runner_env, dict):
+        runner_env = {}
+    return _runner_env_for(tuple(sorted((str(k), str(v)) for k, v in runner_env.items())))
+
+
+@functools.lru_cache(maxsize=1)
+def _runner_env_for(runner_env: Tuple[Tuple[str, str], ...]) -> Dict[str, str]:
+    # Cached: callers must treat the returned dict as read-only.
+    env = os.environ.copy()
+    env.update(runner_env)
+    return env
+
+
+def _run_cmd_capture(
+    argv: List[str], cwd: Path, env: Dict[str, str], log_path: Path
+) -> Tuple[int, Optional[str]]:
+    # Exec the runner directly (no intermediate /bin/sh) with stdout+stderr
+    # going straight to the log file. Not a pipe: anything the runner leaves
+    # running in the background inherits it, and reading to EOF would then
+    # wait on that instead of on the runner.
+    with log_path.open("wb") as f:
+        try:
+            p = subprocess.Popen(
+                argv,
+                cwd=str(cwd),
+                stdout=f,
+                stderr=subprocess.STDOUT,
+                env=env,
+                close_fds=True,
+            )
+        except OSError as e:
+            # No shell to report "not executable"/"not found" for us.
+            f.write(f"TOOLING_ERROR: cannot execute {argv[0]}: {e}\n".encode("utf-8"))
+            return 2, None
+        rc = int(p.wait())
+    return rc, _scan_evidence_dir(log_path)
+
+
+def _scan_evidence_dir(log_path: Path) -> Optional[str]:
+    # First evidence banner in the log: one regex search over the mapped
+    # file, with no decode or line splitting.
+    try:
+        with log_path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                m = _EVIDENCE_RE.search(mm)
+                found = m.group(1) if m else None
+    except (OSError, ValueError):
+        return None
+    return found.decode("utf-8", errors="replace") if found is not None else None
 
 
 
@@ -167,7 +411,7 @@ def cmd_select(args: argparse.Namespace) -> int:
     repo = _repo_root()
     cfg = _load_profiles_config(repo)
     base = args.base or cfg.get("base_branch", "origin/develop")
-    files = _git_diff_files(repo, base)
+    files = [os.fsdecode(f) for f in _git_diff_files(repo, base)]
     profs = _select_profiles(cfg, files)
     if args.json:
         sys.stdout.write(json.dumps({"base": base, "profiles": profs, "files": files}, indent=2))
@@ -181,12 +425,16 @@ def cmd_run(args: argparse.Namespace) -> int:
     cfg = _load_profiles_config(repo)
 
     base = args.base or cfg.get("base_branch", "origin/develop")
+    # One git diff serves both auto-selection and the run fingerprint. The
+    # base/HEAD commits are read first, so a commit landing in between only
+    # makes them look stale to the hooks, never wrongly fresh.
+    head_fp = _head_fingerprint(repo, base)
+    diff_files = _git_diff_files(repo, base)
 
     profiles_arg = args.profiles
     profiles: List[str]
     if profiles_arg == "auto":
-        files = _git_diff_files(repo, base)
-        profiles = _select_profiles(cfg, files)
+        profiles = _select_profiles(cfg, [os.fsdecode(f) for f in diff_files])
     else:
         profiles = [p.strip() for p in profiles_arg.split(",") if p.strip()]
 
@@ -199,8 +447,12 @@ def cmd_run(args: argparse.Namespace) -> int:
         print("TOOLING_ERROR: runner.command_template not configured", file=sys.stderr)
         return 2
 
+    # The template is split like a shell command line, but run without a shell:
+    # one argv per profile, placeholders filled per argument.
+    runner_argv = shlex.split(runner_tpl)
+
     # Ensure runner exists (best-effort)
-    runner_first = runner_tpl.split()[0]
+    runner_first = runner_argv[0]
     runner_path = (repo / runner_first).resolve()
     if not runner_path.exists():
         # We allow PATH-based commands, but for this repo we expect a file.
@@ -213,7 +465,6 @@ def cmd_run(args: argparse.Namespace) -> int:
     _ensure_dir(prof_dir)
 
     # Run metadata
-    diff_files = _git_diff_files(repo, base)
     run_meta: Dict[str, Any] = {
         "run_id": run_id,
         "timestamp": _iso(),
@@ -226,34 +477,58 @@ def cmd_run(args: argparse.Namespace) -> int:
     }
 
     overall_rc = 0
-    env = os.environ.copy()
-    # Merge env vars from runner config
-    runner_env = cfg.get("runner", {}).get("env", {})
-    if isinstance(runner_env, dict):
-        env.update({k: str(v) for k, v in runner_env.items()})
+    env = _build_runner_env(cfg)
 
+    jobs: Dict[str, Tuple[List[str], Path]] = {}
     for profile in profiles:
-        cmd = runner_tpl.format(profile=profile, base_branch=base, repo_root=str(repo))
-        log_path = prof_dir / f"{profile}.log"
+        argv = [a.format(profile=profile, base_branch=base, repo_root=str(repo)) for a in runner_argv]
+        jobs[profile] = (argv, prof_dir / f"{profile}.log")
 
-        rc = _run_cmd_capture(cmd, repo, env, log_path)
-        log_text = log_path.read_text(encoding="utf-8", errors="replace")
-        evidence_dir = _parse_evidence_dir(log_text)
+    # Profiles are independent (own command, own log), so run them concurrently.
+    # --sequential keeps the old one-at-a-time order for reproducing failures.
+    if args.sequential:
+        workers = 1
+    else:
+        workers = args.parallel or min(len(profiles), os.cpu_count() or 4)
+
+    outcomes: Dict[str, Tuple[int, Optional[str]]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(_run_cmd_capture, argv, repo, env, log_path): profile
+            for profile, (argv, log_path) in jobs.items()
+        }
+        for fut in as_completed(futures):
+            rc, evidence_dir = fut.result()
+            outcomes[futures[fut]] = (rc, evidence_dir)
+            if rc == 2:
+                # Tooling error: don't start anything that hasn't started yet,
+                # but record every profile that did run (shutdown waits for them).
+                pool.shutdown(wait=True, cancel_futures=True)
+                for other, name in futures.items():
+                    if name not in outcomes and other.done() and not other.cancelled():
+                        outcomes[name] = other.result()
+                break
+
+    # Populate results serially, in selection order, so run.json is deterministic.
+    for profile in profiles:
+        if profile not in outcomes:
+            continue
+        rc, evidence_dir = outcomes[profile]
+        argv, log_path = jobs[profile]
 
         run_meta["results"][profile] = {
             "exit_code": rc,
-            "command": cmd,
+            "command": shlex.join(argv),
             "evidence_dir": evidence_dir,
             "log_file": str(log_path),
         }
 
         if rc == 2:
             overall_rc = 2
-            break
-        if rc != 0:
+        elif rc != 0 and overall_rc != 2:
             overall_rc = 1
 
-    (out_dir / "run.json").write_text(json.dumps(run_meta, indent=2), encoding="utf-8")
+    (out_dir / "run.json").write_bytes(_dumps(run_meta, pretty=args.pretty))
 
     # Slack-friendly banner
     status = "PASS" if overall_rc == 0 else ("TOOLING_ERROR" if overall_rc == 2 else "FAIL")
@@ -261,7 +536,6 @@ def cmd_run(args: argparse.Namespace) -> int:
     # Persist a small state record so PreToolUse can enforce "freshness".
     try:
         state_dir = repo / ".claude" / "auth_assurance" / ".state"
-        state_dir.mkdir(parents=True, exist_ok=True)
         # Extract per-profile exit codes for fine-grained gating
         profile_exit_codes = {
             p: r.get("exit_code", 999)
@@ -271,6 +545,7 @@ def cmd_run(args: argparse.Namespace) -> int:
             "timestamp": _now(),
             "base_branch": base,
             "diff_fingerprint": run_meta.get("diff_fingerprint"),
+            "head_fingerprint": head_fp,
             "profiles": profiles,
             "exit_code": overall_rc,
             "profile_exit_codes": profile_exit_codes,
@@ -278,7 +553,8 @@ def cmd_run(args: argparse.Namespace) -> int:
             "run_id": run_id,
             "run_json": str(out_dir / "run.json"),
         }
-        (state_dir / "last_run.json").write_text(json.dumps(state, indent=2), encoding="utf-8")
+        # Atomic: a torn last_run.json reads as "no evidence" to both hooks.
+        _write_atomic(state_dir / "last_run.json", _dumps(state))
     except Exception:
         pass
 
@@ -321,24 +597,51 @@ def cmd_validate_policy(args: argparse.Namespace) -> int:
     return 0
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(prog="auth_assurance")
-    sub = parser.add_subparsers(dest="cmd", required=True)
-
+def _add_select_parser(sub: Any) -> None:
     p_sel = sub.add_parser("select", help="select profiles triggered by current diff")
     p_sel.add_argument("--base", default=None)
     p_sel.add_argument("--json", action="store_true")
     p_sel.set_defaults(func=cmd_select)
 
+
+def _add_run_parser(sub: Any) -> None:
     p_run = sub.add_parser("run", help="run one or more profiles")
     p_run.add_argument("--profiles", default="auto", help="comma list or 'auto'")
     p_run.add_argument("--base", default=None)
+    p_run.add_argument("--parallel", type=int, default=0, metavar="N",
+                       help="max profiles to run at once (default: auto)")
+    p_run.add_argument("--sequential", action="store_true",
+                       help="run profiles one at a time, in order")
+    p_run.add_argument("--pretty", action="store_true", help="indent run.json for reading")
     p_run.set_defaults(func=cmd_run)
 
+
+def _add_validate_policy_parser(sub: Any) -> None:
     p_val = sub.add_parser("validate-policy", help="validate gateway policy YAML (syntax + minimal structure)")
     p_val.add_argument("path")
     p_val.set_defaults(func=cmd_validate_policy)
 
+
+_SUBCOMMANDS = {
+    "select": _add_select_parser,
+    "run": _add_run_parser,
+    "validate-policy": _add_validate_policy_parser,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="auth_assurance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    # Only register the subcommand being invoked; -h/--help, a missing or an
+    # unknown subcommand get all of them so usage/errors list every choice.
+    first = sys.argv[1] if len(sys.argv) > 1 else ""
+    if first in _SUBCOMMANDS:
+        _SUBCOMMANDS[first](sub)
+    else:
+        for add_parser in _SUBCOMMANDS.values():
+            add_parser(sub)
+
     args = parser.parse_args()
     return int(args.func(args))
 
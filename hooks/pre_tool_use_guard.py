@@ -12,21 +12,42 @@ PAI-style PreToolUse security gate for Claude Code.
 Design goals (Kamiwaza security lead posture):
 - Fail-closed for secrets and high-risk auth policy files.
 - Require confirmation (ask) for auth/authz code edits when evidence is missing/stale.
-- Log every decision to /tmp/auth-assurance/security/YYYYMMDD/<event_id>.json
+- Log every decision to /tmp/auth-assurance/security/YYYYMMDD/events.jsonl (one JSON object per line)
 """
 
 from __future__ import annotations
 
-import fnmatch
 import json
 import os
-import subprocess
 import sys
+
+# Global kill-switch: only enforce in repos that opt-in via env var.
+# This prevents accidental gating in unrelated projects when hooks are
+# wired globally in ~/.claude/settings.json. Checked before the heavier
+# imports below, since the disabled case is by far the most common one.
+if __name__ == "__main__" and os.environ.get("AUTH_ASSURANCE_ENABLED", "0") != "1":
+    sys.stdout.write(
+        '{"suppressOutput": true, "hookSpecificOutput": '
+        '{"hookEventName": "PreToolUse", "permissionDecision": "allow"}}'
+    )
+    raise SystemExit(0)
+
+import fnmatch
+import functools
+import hashlib
+import re
+import subprocess
+import threading
 import time
-from dataclasses import dataclass
 from pathlib import Path, PurePosixPath
+from types import SimpleNamespace
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None  # optional speedup; stdlib json is the fallback
+
 
 def _now_ts() -> int:
     return int(time.time())
@@ -39,10 +60,10 @@ def _iso(ts: Optional[int] = None) -> str:
 
 
 def _read_stdin_json() -> Dict[str, Any]:
-    raw = sys.stdin.read()
+    raw = sys.stdin.buffer.read()
     if not raw.strip():
         return {}
-    return json.loads(raw)
+    return _loads(raw)
 
 
 def _write_stdout(obj: Dict[str, Any]) -> None:
@@ -87,36 +108,62 @@ def deny(reason: str) -> None:
     })
     raise SystemExit(0)
 
+_REPO_ROOT: Optional[Path] = None
+
+
 def _repo_root() -> Path:
     # Prefer Claude project dir if present; fallback to cwd.
-    return Path(os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())).resolve()
+    # abspath, not resolve(): git -C and our own path joins are fine with a
+    # non-canonical path, so skip the per-component symlink walk.
+    global _REPO_ROOT
+    if _REPO_ROOT is None:
+        _REPO_ROOT = Path(os.path.abspath(os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())))
+    return _REPO_ROOT
+
+
+def _loads(data: bytes) -> Any:
+    # Parse straight from bytes (no separate decode pass)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def _load_json(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text())
+    return _loads(path.read_bytes())
 
 
-def _merge_dict(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+def _merge_dict(base: Dict[str, Any], override: Dict[str, Any], inplace: bool = False) -> Dict[str, Any]:
     # Shallow-ish merge for our small configs
-    out = dict(base)
+    # inplace=True updates `base` and its nested dicts directly (fine when it
+    # was freshly loaded and isn't shared); otherwise only what changes is copied.
+    out = base if inplace else dict(base)
     for k, v in override.items():
-        if isinstance(v, dict) and isinstance(out.get(k), dict):
-            out[k] = dict(out[k])  # type: ignore
-            out[k].update(v)       # type: ignore
+        cur = out.get(k)
+        if isinstance(v, dict) and isinstance(cur, dict):
+            if inplace:
+                cur.update(v)
+            else:
+                out[k] = {**cur, **v}
         else:
             out[k] = v
     return out
 
 
-def _load_config(repo: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+def _load_config(repo: Path) -> Tuple[Dict[str, Any], Dict[str, Any], SimpleNamespace]:
     cfg_dir = repo / ".claude" / "auth_assurance" / "config"
     profiles_path = cfg_dir / "profiles.json"
     policy_path = cfg_dir / "security_policy.json"
 
-    if not profiles_path.exists() or not policy_path.exists():
+    # One listdir answers for every file in cfg_dir (instead of a stat each).
+    try:
+        names = set(os.listdir(cfg_dir))
+    except OSError:
+        names = set()
+
+    if "profiles.json" not in names or "security_policy.json" not in names:
         # If the hook pack isn't installed, be permissive to avoid breaking dev.
         # (Security-lead installs this intentionally; missing config shouldn't brick Claude Code.)
-        return {}, {}
+        return {}, {}, _policy_buckets({})
 
     profiles = _load_json(profiles_path)
     policy = _load_json(policy_path)
@@ -125,78 +172,196 @@ def _load_config(repo: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     # Allow either:
     #   .claude/auth_assurance/config/security_policy.local.json
     #   .claude/local/auth_assurance_overrides/security_policy.json
-    override_candidates = [
-        cfg_dir / "security_policy.local.json",
-        repo / ".claude" / "local" / "auth_assurance_overrides" / "security_policy.json",
-    ]
-    for p in override_candidates:
-        if p.exists():
-            try:
-                policy = _merge_dict(policy, _load_json(p))
-            except Exception:
-                # If override is broken, fail closed for auth-sensitive writes (handled later).
-                pass
+    overrides: List[Path] = []
+    if "security_policy.local.json" in names:
+        overrides.append(cfg_dir / "security_policy.local.json")
+    shared = repo / ".claude" / "local" / "auth_assurance_overrides" / "security_policy.json"
+    if os.path.isfile(shared):
+        overrides.append(shared)
+    for p in overrides:
+        try:
+            policy = _merge_dict(policy, _load_json(p), inplace=True)
+        except Exception:
+            # If override is broken, fail closed for auth-sensitive writes (handled later).
+            pass
 
-    return profiles, policy
+    return profiles, policy, _policy_buckets(policy)
 
 
 def _posix(path: str) -> str:
     return path.replace("\\", "/")
 
 
-def _match_any(path: str, patterns: List[str]) -> bool:
-    p = PurePosixPath(_posix(path))
-    for pat in patterns:
-        try:
-            if p.match(pat):
-                return True
-        except Exception:
-            # Fallback to fnmatch
-            if fnmatch.fnmatchcase(_posix(path), pat):
-                return True
-    return False
+_NEVER = re.compile(r"(?!)")
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_bucket(patterns: Tuple[str, ...], components: bool = False) -> "re.Pattern[str]":
+    # All globs of a bucket as one alternation: one regex scan per path instead
+    # of one glob match per pattern. Alternative i is the named group "p<i>".
+    # With components=True a glob may match any trailing run of path components
+    # (as PurePosixPath.match did), so absolute tool paths still hit
+    # repo-relative patterns. Callers pass PurePosixPath-normalised paths.
+    if not patterns:
+        return _NEVER
+    lead = "(?:^|/)" if components else "^"
+    body = "|".join(f"(?P<p{i}>{fnmatch.translate(p)})" for i, p in enumerate(patterns))
+    return re.compile(f"{lead}(?:{body})")
+
 
+def _policy_buckets(policy: Dict[str, Any]) -> SimpleNamespace:
+    # Path-gating glob tuples per bucket, extracted once per config load.
+    # They are compiled with _compile_bucket(bucket, True) only when a check
+    # reaches them, since most calls need one bucket or none. Use .search()
+    # on a normalised posix path.
+    def bucket(*keys: str) -> Tuple[str, ...]:
+        return tuple(str(p) for p in _policy_lists(policy, *keys))
 
-def _git_diff_files(repo: Path, base_branch: str) -> List[str]:
+    return SimpleNamespace(
+        zero_access=bucket("paths", "zeroAccess"),
+        confirm_write=bucket("paths", "confirmWrite"),
+        require_success=bucket("evidence", "require_success_for_paths"),
+        require_confirm=bucket("evidence", "require_confirm_without_evidence_for_paths"),
+    )
+
+
+def _git_diff_files(repo: Path, base_branch: str) -> List[bytes]:
+    # -z: NUL-terminated raw paths, no quoting and nothing to strip.
+    # --no-renames: skip rename scoring; a rename lists both old and new path.
     try:
-        out = subprocess.check_output(
-            ["git", "-C", str(repo), "diff", "--name-only", f"{base_branch}...HEAD"],
-            text=True,
+        out = subprocess.run(
+            ["git", "-C", str(repo), "diff", "--name-only", "--no-renames", "-z", f"{base_branch}...HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=False,
         )
-        files = [l.strip() for l in out.splitlines() if l.strip()]
-        return sorted(files)
     except Exception:
         return []
+    if out.returncode != 0:
+        return []
+    # Already in git's path order (byte-wise, stable), which the fingerprint
+    # is taken over; no re-sort needed.
+    return out.stdout.split(b"\0")[:-1]
 
 
-def _fingerprint(files: List[str]) -> str:
-    # stable string fingerprint
-    import hashlib
-    h = hashlib.sha256()
-    for f in files:
-        h.update(f.encode("utf-8"))
-        h.update(b"\n")
-    return h.hexdigest()
+def _fingerprint(files: List[bytes]) -> str:
+    # Only ever compared for equality with the last run's value, so a 128-bit
+    # BLAKE2b over the newline-joined paths (one hash call) is plenty.
+    return hashlib.blake2b(b"\n".join(files), digest_size=16).hexdigest()
 
 
-def _read_state(repo: Path, rel_path: str) -> Optional[Dict[str, Any]]:
-    p = repo / rel_path
-    if not p.exists():
+_SHA_RE = re.compile(r"[0-9a-f]{40}(?:[0-9a-f]{24})?")
+
+
+def _git_dirs(repo: Path) -> Optional[Tuple[Path, Path]]:
+    # (git_dir, common_dir). In a linked worktree .git is a "gitdir: <path>"
+    # file and branch refs live in the main repo's dir named by "commondir".
+    dot_git = repo / ".git"
+    try:
+        if dot_git.is_dir():
+            git_dir = dot_git
+        else:
+            line = dot_git.read_text().strip()
+            if not line.startswith("gitdir: "):
+                return None
+            git_dir = repo / line[len("gitdir: "):]
+    except OSError:
         return None
     try:
-        return json.loads(p.read_text())
+        common_dir = git_dir / (git_dir / "commondir").read_text().strip()
+    except OSError:
+        common_dir = git_dir
+    return git_dir, common_dir
+
+
+def _read_ref(dirs: Tuple[Path, Path], ref: str, depth: int = 0) -> Optional[str]:
+    # Resolve a full ref name to a SHA from loose refs / packed-refs.
+    git_dir, common_dir = dirs
+    if depth > 5:
+        return None
+    for d in dict.fromkeys((git_dir, common_dir)):
+        try:
+            val = (d / ref).read_text().strip()
+        except OSError:
+            continue
+        if val.startswith("ref: "):
+            return _read_ref(dirs, val[len("ref: "):], depth + 1)
+        return val if _SHA_RE.fullmatch(val) else None
+    try:
+        with (common_dir / "packed-refs").open(encoding="utf-8") as f:
+            for line in f:
+                sha, _, name = line.rstrip("\n").partition(" ")
+                if name == ref and _SHA_RE.fullmatch(sha):
+                    return sha
+    except OSError:
+        pass
+    return None
+
+
+def _rev_sha(dirs: Tuple[Path, Path], rev: str) -> Optional[str]:
+    # SHA for HEAD or a branch/tag/remote name, looked up in the same order as
+    # git rev-parse, without spawning git. None for anything fancier
+    # (rev~N, @{u}, ...) or storage we don't read (e.g. reftable).
+    if _SHA_RE.fullmatch(rev):
+        return rev
+    for ref in (rev, f"refs/{rev}", f"refs/tags/{rev}", f"refs/heads/{rev}",
+                f"refs/remotes/{rev}", f"refs/remotes/{rev}/HEAD"):
+        sha = _read_ref(dirs, ref)
+        if sha:
+            return sha
+    return None
+
+
+def _head_fingerprint(repo: Path, base_branch: str) -> Optional[str]:
+    # "<base sha>:<HEAD sha>", read from .git without spawning git. The
+    # base...HEAD file list is fixed by these two commits, so an equal value
+    # means an unchanged diff. None if either can't be resolved this way.
+    dirs = _git_dirs(repo)
+    if dirs is None:
+        return None
+    head_sha = _rev_sha(dirs, "HEAD")
+    base_sha = _rev_sha(dirs, base_branch)
+    if not head_sha or not base_sha:
+        return None
+    return f"{base_sha}:{head_sha}"
+
+
+def _read_state(repo: Path, rel_path: str) -> Optional[Dict[str, Any]]:
+    # A missing file lands in the except too; no separate exists() stat.
+    try:
+        return _loads((repo / rel_path).read_bytes())
     except Exception:
         return None
 
 
+_LOG_DIRS_READY: set = set()
+
+
 def _log_security_event(repo: Path, event: Dict[str, Any]) -> None:
     day = time.strftime("%Y%m%d", time.localtime(_now_ts()))
     out_dir = Path("/tmp/auth-assurance/security") / day
     try:
-        out_dir.mkdir(parents=True, exist_ok=True)
-        # small unique-ish id
-        eid = f"{_now_ts()}_{os.getpid()}"
-        (out_dir / f"{eid}.json").write_text(json.dumps(event, indent=2))
+        if out_dir not in _LOG_DIRS_READY:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            _LOG_DIRS_READY.add(out_dir)
+        # One O_APPEND write per event: concurrent hooks append whole lines
+        # to the same per-day file instead of creating a file each.
+        if orjson is not None:
+            line = orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+        else:
+            line = (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8")
+        # /tmp is shared and the path is predictable: never follow a planted
+        # symlink, keep the log private, and don't append to someone else's file.
+        fd = os.open(
+            out_dir / "events.jsonl",
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_NOFOLLOW | os.O_CLOEXEC,
+            0o600,
+        )
+        try:
+            if os.fstat(fd).st_uid == os.getuid():
+                os.write(fd, line)
+        finally:
+            os.close(fd)
     except Exception:
         # Never break the hook due to logging failure
         pass
@@ -220,22 +385,50 @@ def _bash_patterns(policy: Dict[str, Any], bucket: str) -> List[Dict[str, str]]:
 
 
 def _match_bash(cmd: str, patterns: List[Dict[str, str]]) -> Optional[str]:
-    for p in patterns:
-        pat = p.get("pattern", "")
-        if pat and fnmatch.fnmatchcase(cmd, pat):
-            return p.get("reason", "matched security policy")
-    return None
+    pats = [p for p in patterns if p.get("pattern")]
+    m = _compile_bucket(tuple(p["pattern"] for p in pats)).match(cmd)
+    if m is None or m.lastgroup is None:
+        return None
+    # Alternation is ordered, so this is the first pattern that matches.
+    return pats[int(m.lastgroup[1:])].get("reason", "matched security policy")
 
 
-def main() -> None:
-    # Global kill-switch: only enforce in repos that opt-in via env var.
-    # This prevents accidental gating in unrelated projects when hooks are
-    # wired globally in ~/.claude/settings.json.
-    if os.environ.get("AUTH_ASSURANCE_ENABLED", "0") != "1":
-        allow()
+def _reusable_fingerprint(repo: Path, base_branch: str, state: Optional[Dict[str, Any]]) -> Optional[str]:
+    # The last run's diff fingerprint, if that run saw the same base and HEAD
+    # commits as now (so base...HEAD can't have changed since).
+    if not state or state.get("base_branch") != base_branch:
+        return None
+    head_fp = state.get("head_fingerprint")
+    if not head_fp or head_fp != _head_fingerprint(repo, base_branch):
+        return None
+    fp = state.get("diff_fingerprint")
+    return fp if isinstance(fp, str) else None
 
+
+_DEFAULT_BASE_BRANCH = "origin/develop"
+_DEFAULT_STATE_FILE = ".claude/auth_assurance/.state/last_run.json"
+
+
+def main() -> None:
     repo = _repo_root()
-    profiles_cfg, policy = _load_config(repo)
+
+    # Usually nothing was committed since the last run, and its fingerprint
+    # is still current. Otherwise the git diff (a subprocess) doesn't depend
+    # on anything but the base branch, so start it against the default base
+    # while the config and stdin load; it is only redone if the config names
+    # a different base.
+    state = _read_state(repo, _DEFAULT_STATE_FILE)
+    fp = _reusable_fingerprint(repo, _DEFAULT_BASE_BRANCH, state)
+    spec_diff: List[List[bytes]] = []
+    spec_thread: Optional[threading.Thread] = None
+    if fp is None:
+        spec_thread = threading.Thread(
+            target=lambda: spec_diff.append(_git_diff_files(repo, _DEFAULT_BASE_BRANCH)),
+            daemon=True,
+        )
+        spec_thread.start()
+
+    profiles_cfg, policy, buckets = _load_config(repo)
 
     payload = _read_stdin_json()
     session_id = payload.get("session_id")
@@ -246,14 +439,21 @@ def main() -> None:
     if not profiles_cfg or not policy:
         allow()
 
-    base_branch = profiles_cfg.get("base_branch", "origin/develop")
-    state_rel = policy.get("evidence", {}).get("state_file", ".claude/auth_assurance/.state/last_run.json")
+    base_branch = profiles_cfg.get("base_branch", _DEFAULT_BASE_BRANCH)
+    state_rel = policy.get("evidence", {}).get("state_file", _DEFAULT_STATE_FILE)
     max_age = int(policy.get("evidence", {}).get("max_age_seconds", 3600))
 
     # Gather evidence freshness
-    diff_files = _git_diff_files(repo, base_branch)
-    fp = _fingerprint(diff_files)
-    state = _read_state(repo, state_rel)
+    if base_branch != _DEFAULT_BASE_BRANCH or state_rel != _DEFAULT_STATE_FILE:
+        state = _read_state(repo, state_rel)
+        fp = _reusable_fingerprint(repo, base_branch, state)
+    if fp is None:
+        if base_branch == _DEFAULT_BASE_BRANCH and spec_thread is not None:
+            spec_thread.join()
+            diff_files = spec_diff[0] if spec_diff else _git_diff_files(repo, base_branch)
+        else:
+            diff_files = _git_diff_files(repo, base_branch)
+        fp = _fingerprint(diff_files)
 
     # Evidence state:
     # - evidence_pass: last run for this diff was PASS and fresh (overall)
@@ -321,10 +521,13 @@ def main() -> None:
         file_path = ""
         if isinstance(tool_input, dict):
             file_path = str(tool_input.get("file_path", tool_input.get("path", "")))
-        file_path = _posix(file_path)
+        # Normalise "//" and "/./" away (as PurePosixPath.match did), since the
+        # bucket regexes see the raw string: "config//x.yaml" must still match.
+        if file_path:
+            file_path = str(PurePosixPath(_posix(file_path)))
 
         # Absolute deny for secrets
-        if _match_any(file_path, _policy_lists(policy, "paths", "zeroAccess")):
+        if _compile_bucket(buckets.zero_access, True).search(file_path):
             _log_security_event(repo, {
                 "ts": _iso(), "session_id": session_id, "tool": tool_name,
                 "decision": "block", "reason": "zeroAccess", "path": file_path,
@@ -335,7 +538,7 @@ def main() -> None:
         # Policy files (auth_gateway_policy*.yaml) only require authn-gateway to pass,
         # not the entire multi-profile run. This prevents unrelated type errors from
         # blocking policy edits.
-        if _match_any(file_path, _policy_lists(policy, "evidence", "require_success_for_paths")):
+        if _compile_bucket(buckets.require_success, True).search(file_path):
             if not authn_gateway_pass:
                 _log_security_event(repo, {
                     "ts": _iso(), "session_id": session_id, "tool": tool_name,
@@ -349,7 +552,7 @@ def main() -> None:
                 )
 
         # Confirm for auth surfaces without evidence
-        if _match_any(file_path, _policy_lists(policy, "evidence", "require_confirm_without_evidence_for_paths")):
+        if _compile_bucket(buckets.require_confirm, True).search(file_path):
             if not ran_fresh_for_diff:
                 _log_security_event(repo, {
                     "ts": _iso(), "session_id": session_id, "tool": tool_name,
@@ -362,7 +565,11 @@ def main() -> None:
                 )
 
         # Confirm writes for broad auth surfaces
-        if tool_name in ("Edit", "Write") and _match_any(file_path, _policy_lists(policy, "paths", "confirmWrite")) and not ran_fresh_for_diff:
+        if (
+            tool_name in ("Edit", "Write")
+            and not ran_fresh_for_diff
+            and _compile_bucket(buckets.confirm_write, True).search(file_path)
+        ):
             _log_security_event(repo, {
                 "ts": _iso(), "session_id": session_id, "tool": tool_name,
                 "decision": "ask", "reason": "confirmWrite", "path": file_path,
@@ -0,0 +1,174 @@
+"""
+Glob matching cross-checks.
+
+Profile selection and the guard's path buckets compile globs into regexes
+built from fnmatch.translate output; these tests pin them to the reference
+semantics they replace:
+- trigger selection == fnmatch.fnmatchcase of each changed file
+- guard buckets match whenever the baseline PurePosixPath.match did
+
+Run from the repo root:  python3 -m unittest discover -s tests
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import importlib.util
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import warnings
+from pathlib import Path, PurePosixPath
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _load(rel: str, name: str):
+    spec = importlib.util.spec_from_file_location(name, ROOT / rel)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+auth_assurance = _load("bin/auth_assurance.py", "auth_assurance")
+stop_orchestrator = _load("hooks/stop_orchestrator.py", "stop_orchestrator")
+pre_tool_use_guard = _load("hooks/pre_tool_use_guard.py", "pre_tool_use_guard")
+
+TRIGGERS = [
+    "kamiwaza/services/auth/**", "*.py", "README.md", "docs/*.md", "a?c/x",
+    "[ab]/y", "k*/z", "x/y", "a[!x]b", "[!k]*/z", "a[!]]b", "x[!a-c]", "[]]y",
+    "[a[!b]c", "\\[!x]", "docs/[!.]*.md", "*[!/]", "[!a]", "?[!]", "a[\x01-z]b",
+]
+COMPONENTS = [
+    "kamiwaza", "services", "auth", "a.py", "README.md", "docs", "abc", "a",
+    "b", "c", "y", "z", "x", "ayb", "axb", "a]b", "xd", "]y", "[c", "\\yx",
+    ".md", "a.md",
+]
+
+
+def _random_path(rng: random.Random) -> str:
+    return "/".join(rng.choices(COMPONENTS, k=rng.randint(1, 3)))
+
+
+class SelectProfilesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        warnings.simplefilter("ignore", FutureWarning)
+
+    def test_matches_fnmatchcase(self) -> None:
+        rng = random.Random(3)
+        for _ in range(3000):
+            profiles = {
+                f"p{i}": {"triggers": rng.sample(TRIGGERS, rng.randint(1, 3))}
+                for i in range(3)
+            }
+            files = sorted({_random_path(rng) for _ in range(rng.randint(1, 6))})
+            expected = sorted(
+                name for name, p in profiles.items()
+                if any(fnmatch.fnmatchcase(f, t) for f in files for t in p["triggers"])
+            )
+            for mod in (auth_assurance, stop_orchestrator):
+                cfg = {"profiles": profiles}
+                self.assertEqual(mod._select_profiles(cfg, files), expected, (mod.__name__, profiles, files))
+                cfg["_selectors"] = mod._build_selectors(cfg)
+                self.assertEqual(mod._select_profiles(cfg, files), expected, (mod.__name__, profiles, files))
+
+    def test_classes_stay_within_one_path(self) -> None:
+        # Joined as "a\nb": no class may match the newline between them.
+        for trigger in ("a[!x]b", "a[\x01-z]b", "a[!]]b"):
+            for mod in (auth_assurance, stop_orchestrator):
+                cfg = {"profiles": {"p": {"triggers": [trigger]}}}
+                self.assertEqual(mod._select_profiles(cfg, ["a", "b"]), [], (mod.__name__, trigger))
+
+    def test_skips_all_and_manual_profiles(self) -> None:
+        cfg = {"profiles": {
+            "all": {"triggers": ["**"]},
+            "manual": {"triggers": ["**"], "auto_select": False},
+            "auto": {"triggers": ["**"]},
+        }}
+        for mod in (auth_assurance, stop_orchestrator):
+            self.assertEqual(mod._select_profiles(cfg, ["x"]), ["auto"])
+
+
+class CompileBucketTest(unittest.TestCase):
+    POLICY = json.loads((ROOT / "config" / "security_policy.json").read_text())
+
+    @staticmethod
+    def _baseline(path: str, patterns) -> bool:
+        # The guard's original _match_any.
+        p = PurePosixPath(path)
+        for pat in patterns:
+            try:
+                if p.match(pat):
+                    return True
+            except Exception:
+                if fnmatch.fnmatchcase(path, pat):
+                    return True
+        return False
+
+    def _buckets(self):
+        b = pre_tool_use_guard._policy_buckets(self.POLICY)
+        return [b.zero_access, b.confirm_write, b.require_success, b.require_confirm]
+
+    def test_never_fails_open_against_baseline(self) -> None:
+        rng = random.Random(5)
+        parts = [
+            "", "repo", "kamiwaza", "services", "auth", "authz", "dependencies",
+            "auth.py", "config", "auth_gateway_policy.yaml", "auth_gateway_policy.dev.yaml",
+            ".env", ".env.local", ".ssh", "id_rsa", "id_ed25519.pub", "x.pem", "api.key",
+            "spicedb", "schema.zed", "docs", "readme.md", ".", "tmp",
+        ]
+        for _ in range(5000):
+            raw = "/".join(rng.choices(parts, k=rng.randint(1, 6)))
+            if rng.random() < 0.5:
+                raw = "/" + raw
+            path = str(PurePosixPath(raw))
+            for patterns in self._buckets():
+                if self._baseline(raw, patterns):
+                    rx = pre_tool_use_guard._compile_bucket(patterns, True)
+                    self.assertIsNotNone(rx.search(path), (raw, patterns))
+
+    def test_known_paths(self) -> None:
+        zero, _, success, confirm = [pre_tool_use_guard._compile_bucket(p, True) for p in self._buckets()]
+        self.assertTrue(zero.search("/repo/.env"))
+        self.assertTrue(zero.search("/home/u/.ssh/id_rsa"))
+        self.assertTrue(success.search("/repo/config/auth_gateway_policy.yaml"))
+        self.assertTrue(confirm.search("/repo/kamiwaza/dependencies/auth.py"))
+        self.assertFalse(confirm.search("/repo/docs/readme.md"))
+
+
+class GuardPathNormalisationTest(unittest.TestCase):
+    # End to end: "//" and "/./" in a tool path must not slip past the buckets.
+
+    def setUp(self) -> None:
+        self.repo = Path(tempfile.mkdtemp())
+        cfg = self.repo / ".claude" / "auth_assurance" / "config"
+        cfg.mkdir(parents=True)
+        for name in ("profiles.json", "security_policy.json"):
+            shutil.copy(ROOT / "config" / name, cfg / name)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.repo, ignore_errors=True)
+
+    def _decision(self, file_path: str) -> str:
+        env = dict(os.environ, CLAUDE_PROJECT_DIR=str(self.repo), AUTH_ASSURANCE_ENABLED="1")
+        payload = json.dumps({"tool_name": "Edit", "tool_input": {"file_path": file_path}})
+        out = subprocess.run(
+            [sys.executable, str(ROOT / "hooks" / "pre_tool_use_guard.py")],
+            input=payload.encode(), env=env, stdout=subprocess.PIPE, check=True,
+        ).stdout
+        return json.loads(out)["hookSpecificOutput"]["permissionDecision"]
+
+    def test_non_normalised_paths(self) -> None:
+        r = str(self.repo)
+        for sep in ("//", "/./"):
+            self.assertEqual(self._decision(f"{r}/config{sep}auth_gateway_policy.yaml"), "deny")
+            self.assertEqual(self._decision(f"{r}/kamiwaza{sep}dependencies/auth.py"), "ask")
+
+
+if __name__ == "__main__":
+    unittest.main()